@@ -100,6 +100,13 @@ _wad() {
         return 0
       fi
       ;;
+    status)
+      # `wad status <env> [--wait] [--interval N]`
+      if (( COMP_CWORD >= 3 )); then
+        COMPREPLY=( $(compgen -W "--wait --interval" -- "$cur") )
+        return 0
+      fi
+      ;;
     rm)
       # `wad rm <env> [--force]`
       if (( COMP_CWORD >= 3 )); then
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import asyncio
-import contextlib
+import inspect
 import json
+import sys
 from typing import Any
 
 from fastmcp.server import FastMCP
@@ -10,8 +11,8 @@ from fastmcp.server.context import Context
 from fastmcp.server.dependencies import CurrentContext, Progress
 from fastmcp.server.tasks import TaskConfig
 
-from wad_mcp_server.status import WadStatus, now_rfc3339
-from wad_mcp_server.wad import WadResult, format_command, run_wad, run_wad_with_status
+from wad_mcp_server.status import WadStatus
+from wad_mcp_server.wad import WadResult, _apply_status_update, run_wad, run_wad_with_status
 
 
 def _result_payload(result: WadResult) -> dict[str, Any]:
@@ -19,7 +20,7 @@ def _result_payload(result: WadResult) -> dict[str, Any]:
         "ok": result.returncode == 0,
         "returncode": result.returncode,
         "command": result.command,
-        "command_str": format_command(result.command),
+        "command_str": result.command_str,
         "cwd": result.cwd,
         "stdout": result.stdout,
         "stderr": result.stderr,
@@ -28,40 +29,50 @@ def _result_payload(result: WadResult) -> dict[str, Any]:
 
     # Convenience: include the last status marker (if any) so clients that do not
     # subscribe to notifications can still get a machine-readable final status.
-    payload["last_status"] = _extract_last_status_json(result.combined)
+    # The marker is captured while the output streams in (see run_wad_with_status).
+    last_status = result.last_status
+    payload["last_status"] = last_status.to_dict() if last_status is not None else None
 
     return payload
 
 
-def _extract_last_status_json(combined: str) -> dict[str, Any] | None:
-    """Extract the last WAD_STATUS JSON object from combined output."""
+_JSON_DECODER = json.JSONDecoder()
+_RESULT_HEADER = "Result (if any):"
 
-    last: dict[str, Any] | None = None
-    for line in combined.splitlines():
-        if not line.startswith("WAD_STATUS "):
-            continue
-        payload = line[len("WAD_STATUS ") :].strip()
-        try:
-            obj = json.loads(payload)
-        except Exception:
-            continue
-        if isinstance(obj, dict):
-            last = obj
-    return last
 
+def _parse_goose_result_from_status_output(combined: str, *, skip_markers: bool = False) -> Any | None:
+    """Best-effort parse the JSON blob printed by `wad status` (if any).
 
-def _parse_goose_result_from_status_output(combined: str) -> Any | None:
-    """Best-effort parse the JSON blob printed by `wad status` (if any)."""
+    Set `skip_markers` for `wad status --wait` output, which may contain
+    WAD_STATUS marker lines whose JSON is not the goose result.
+    """
 
-    start = combined.find("{")
+    # The result follows the "Result (if any):" header; start there when present.
+    offset = combined.find(_RESULT_HEADER)
+    if offset == -1:
+        offset = 0
+        if skip_markers:
+            # Only markers at the start of a line count; the result itself may
+            # mention WAD_STATUS.
+            marker = combined.rfind("\nWAD_STATUS ")
+            if marker == -1 and combined.startswith("WAD_STATUS "):
+                marker = 0
+            if marker != -1:
+                offset = combined.find("\n", marker + 1) + 1
+                if offset == 0:
+                    return None
+
+    start = combined.find("{", offset)
     if start == -1:
         return None
 
-    maybe = combined[start:]
+    # raw_decode stops at the end of the object, so trailing output (e.g. stderr
+    # appended to combined) neither costs a scan nor breaks the parse.
     try:
-        return json.loads(maybe)
-    except Exception:
+        obj, _ = _JSON_DECODER.raw_decode(combined, start)
+    except ValueError:
         return None
+    return obj
 
 
 async def _emit_status(
@@ -82,27 +93,8 @@ async def _emit_status(
         message=message,
         step=step,
         total=total,
-        ts=now_rfc3339(),
     )
-
-    # Persist machine-readable JSON into Docket progress, which FastMCP exposes
-    # as MCP task statusMessage.
-    with contextlib.suppress(Exception):
-        await progress.set_message(status.to_status_message())
-
-    # Also emit a human-friendly log with structured `extra`.
-    with contextlib.suppress(Exception):
-        await ctx.log(
-            message,
-            level="info",
-            logger_name="wad.status",
-            extra=status.to_dict(),
-        )
-
-    # Best-effort progress notification if client provided progressToken.
-    if step is not None:
-        with contextlib.suppress(Exception):
-            await ctx.report_progress(step, total, message)
+    await _apply_status_update(ctx=ctx, progress=progress, status=status)
 
 
 mcp = FastMCP(
@@ -412,93 +404,83 @@ async def wad_agent_wait(
         payload["parsed_json"] = None
         return payload
 
-    # Phase 2: poll status until done
-    await _emit_status(
+    # Phase 2: wait for completion. `wad status --wait` blocks inside the
+    # devcontainer and streams WAD_STATUS markers (keep-alives, then a terminal
+    # `agent.finished` / `agent.failed`), so one child covers the whole wait.
+    wait_result = await run_wad_with_status(
+        "status",
+        env,
+        "--wait",
+        "--interval",
+        str(poll_interval_s),
         ctx=ctx,
         progress=progress,
-        code="agent.running",
-        state="running",
-        message="Goose agent running",
-        step=2,
-        total=3,
+        repo_path=repo_path,
+        timeout_s=timeout_s,
     )
 
-    start_t = asyncio.get_event_loop().time()
-
-    while True:
-        if timeout_s is not None:
-            elapsed = asyncio.get_event_loop().time() - start_t
-            if elapsed > timeout_s:
-                await _emit_status(
-                    ctx=ctx,
-                    progress=progress,
-                    code="agent.failed",
-                    state="failed",
-                    message=f"Timed out waiting for goose agent after {timeout_s}s",
-                    step=3,
-                    total=3,
-                )
-                break
-
-        status_result = await run_wad("status", env, repo_path=repo_path)
-        combined = status_result.combined
-
-        done = "done:    yes" in combined
-        running = "running: yes" in combined
-
-        if done:
-            exit_code: int | None = None
-            for line in combined.splitlines():
-                if line.strip().startswith("exit:"):
-                    try:
-                        exit_code = int(line.split(":", 1)[1].strip())
-                    except Exception:
-                        exit_code = None
-
-            if exit_code == 0:
-                await _emit_status(
-                    ctx=ctx,
-                    progress=progress,
-                    code="agent.finished",
-                    state="completed",
-                    message="Goose agent finished successfully",
-                    step=3,
-                    total=3,
-                )
-            else:
-                await _emit_status(
-                    ctx=ctx,
-                    progress=progress,
-                    code="agent.failed",
-                    state="failed",
-                    message=f"Goose agent failed (exit={exit_code})",
-                    step=3,
-                    total=3,
-                )
-            break
-
-        if running:
-            # keep-alive status so UIs update timestamps
-            await _emit_status(
-                ctx=ctx,
-                progress=progress,
-                code="agent.running",
-                state="running",
-                message="Goose agent running",
-                step=2,
-                total=3,
-            )
-
-        await asyncio.sleep(poll_interval_s)
-
-    # Return the final status payload (best-effort JSON extraction)
-    final_status = await run_wad("status", env, repo_path=repo_path)
-    payload = _result_payload(final_status)
-    payload["parsed_json"] = _parse_goose_result_from_status_output(payload.get("combined", ""))
+    last_status = wait_result.last_status
+    if wait_result.returncode == 124:
+        await _emit_status(
+            ctx=ctx,
+            progress=progress,
+            code="agent.failed",
+            state="failed",
+            message=f"Timed out waiting for goose agent after {timeout_s}s",
+            step=3,
+            total=3,
+        )
+    elif last_status is None or last_status.state not in ("completed", "failed"):
+        await _emit_status(
+            ctx=ctx,
+            progress=progress,
+            code="agent.failed",
+            state="failed",
+            message=f"Failed waiting for goose agent (exit={wait_result.returncode})",
+            step=3,
+            total=3,
+        )
+
+    # The wait already ends with the final `wad status` output; return it as-is
+    # (best-effort JSON extraction).
+    payload = _result_payload(wait_result)
+    payload["parsed_json"] = _parse_goose_result_from_status_output(
+        payload.get("combined", ""), skip_markers=True
+    )
 
     return payload
 
 
+def _run_supports_transport() -> bool:
+    """Whether this FastMCP release accepts `transport=` in `run()`."""
+
+    try:
+        return "transport" in inspect.signature(FastMCP.run).parameters
+    except Exception:
+        return False
+
+
+# The installed FastMCP API does not change at runtime; check it once.
+_MCP_SUPPORTS_TRANSPORT = _run_supports_transport()
+
+
+def _install_uvloop() -> None:
+    """Use uvloop for the server's event loop when it is installed.
+
+    Every tool shells out to `wad`, so the server is dominated by subprocess and
+    pipe I/O, which uvloop handles faster than the stdlib loop. Without uvloop
+    (or on Windows) the default asyncio loop is used.
+    """
+
+    if sys.platform == "win32":
+        return
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
 def main() -> None:
     """Entrypoint for the stdio MCP server.
 
@@ -509,16 +491,12 @@ def main() -> None:
       the `transport=` parameter is supported.
     """
 
-    # Stdio transport for local tool usage.
-    try:
-        import inspect
+    _install_uvloop()
 
-        if "transport" in inspect.signature(mcp.run).parameters:
-            mcp.run(transport="stdio")
-        else:
-            mcp.run()
-    except Exception:
-        # Fall back to the default behavior if introspection fails.
+    # Stdio transport for local tool usage.
+    if _MCP_SUPPORTS_TRANSPORT:
+        mcp.run(transport="stdio")
+    else:
         mcp.run()
 
 
@@ -2,9 +2,30 @@ from __future__ import annotations
 
 import json
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from datetime import UTC, datetime
 from typing import Any, Literal
 
+try:
+    import orjson
+except ImportError:  # optional speedup, see the `speedups` extra
+    orjson = None
+
+
+def _loads(data: str | bytes) -> Any:
+    """JSON decoding (orjson when available); accepts str or UTF-8 bytes."""
+
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps(obj: Any) -> str:
+    """Compact JSON encoding (orjson when available)."""
+
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
 
 # NOTE: MCP task status messages are plain strings (SEP-1686 statusMessage).
 # We embed a JSON object in that string so clients can parse it.
@@ -17,7 +38,7 @@ StatusState = Literal[
 ]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class WadStatus:
     """A machine-readable status update for long-running WAD operations."""
 
@@ -32,6 +53,46 @@ class WadStatus:
     # RFC3339 timestamp (server-side) for clients that want ordering.
     ts: str | None = None
 
+    @classmethod
+    def from_json(cls, payload: str | bytes) -> WadStatus | None:
+        """Decode a marker payload (the JSON after `WAD_STATUS `).
+
+        Accepts raw bytes so stream readers can skip decoding the line.
+        """
+
+        try:
+            obj = _loads(payload)
+        except Exception:
+            return None
+        return cls.from_dict(obj)
+
+    @classmethod
+    def from_dict(cls, obj: Any) -> WadStatus | None:
+        """Validate a decoded status payload; returns None if it is malformed."""
+
+        if type(obj) is not dict:
+            return None
+
+        code = obj.get("code")
+        state = obj.get("state")
+        message = obj.get("message")
+        if type(code) is not str or type(state) is not str or type(message) is not str:
+            return None
+
+        step = obj.get("step")
+        total = obj.get("total")
+        ts = obj.get("ts")
+
+        # Exact type checks: JSON booleans must not pass as step counters.
+        return cls(
+            code=code,
+            state=state,  # type: ignore[arg-type]
+            message=message,
+            step=step if type(step) is int else None,
+            total=total if type(total) is int else None,
+            ts=ts if type(ts) is str else None,
+        )
+
     def to_dict(self) -> dict[str, Any]:
         d: dict[str, Any] = {
             "namespace": "wad",
@@ -47,14 +108,17 @@ class WadStatus:
             d["ts"] = self.ts
         return d
 
-    def to_status_message(self) -> str:
-        """Serialize to the string stored in MCP task statusMessage."""
+    def to_status_message(self, d: dict[str, Any] | None = None) -> str:
+        """Serialize to the string stored in MCP task statusMessage.
+
+        Callers that already built :meth:`to_dict` can pass it as `d`.
+        """
 
-        return json.dumps(self.to_dict(), separators=(",", ":"), ensure_ascii=False)
+        return _dumps(self.to_dict() if d is None else d)
 
 
 def now_rfc3339() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    return datetime.now(UTC).isoformat()
 
 
 def parse_wad_status_line(line: str) -> WadStatus | None:
@@ -70,34 +134,4 @@ def parse_wad_status_line(line: str) -> WadStatus | None:
     if not line.startswith(prefix):
         return None
 
-    payload = line[len(prefix) :].strip()
-    if not payload:
-        return None
-
-    try:
-        obj = json.loads(payload)
-    except Exception:
-        return None
-
-    if not isinstance(obj, dict):
-        return None
-
-    code = obj.get("code")
-    state = obj.get("state")
-    message = obj.get("message")
-
-    if not isinstance(code, str) or not isinstance(state, str) or not isinstance(message, str):
-        return None
-
-    step = obj.get("step")
-    total = obj.get("total")
-    ts = obj.get("ts")
-
-    return WadStatus(
-        code=code,
-        state=state,  # type: ignore[arg-type]
-        message=message,
-        step=step if isinstance(step, int) else None,
-        total=total if isinstance(total, int) else None,
-        ts=ts if isinstance(ts, str) else None,
-    )
+    return WadStatus.from_json(line[len(prefix) :])
@@ -4,26 +4,48 @@ import asyncio
 import contextlib
 import os
 import shlex
+import signal
 from collections.abc import Awaitable, Callable, Iterable
 from dataclasses import dataclass
+from functools import cache, lru_cache
 from pathlib import Path
 
 from fastmcp.server.context import Context
 from fastmcp.server.dependencies import Progress
 
-from wad_mcp_server.status import WadStatus, now_rfc3339, parse_wad_status_line
+from wad_mcp_server.status import WadStatus, now_rfc3339
 
+_STATUS_PREFIX = b"WAD_STATUS "
 
-@dataclass(frozen=True)
+# Pipe read size for plain output capture.
+_READ_CHUNK = 65536
+
+# After a timeout kill, how long readers may keep draining the pipes.
+_KILL_GRACE_S = 1.0
+
+# Prefer disabling ANSI output when supported.
+# WAD uses hardcoded color codes today, but this helps future changes.
+_ENV_DEFAULTS = {"NO_COLOR": "1", "TERM": "dumb"}
+
+# Also enable structured status marker emission from the `wad` bash script.
+_STATUS_ENV_DEFAULTS = {**_ENV_DEFAULTS, "WAD_MCP_STATUS": "1"}
+
+
+@dataclass(frozen=True, slots=True)
 class WadResult:
     """Result of running a WAD command."""
 
     command: list[str]
+    # Shell-quoted `command`, built once by the runners.
+    command_str: str
     cwd: str
     returncode: int
     stdout: str
     stderr: str
 
+    # Last WAD_STATUS marker observed while streaming output (if any).
+    last_status: WadStatus | None = None
+
     @property
     def combined(self) -> str:
         if not self.stderr:
@@ -33,6 +55,7 @@ class WadResult:
         return f"{self.stdout}\n{self.stderr}"
 
 
+@cache
 def _default_repo_path() -> Path:
     """Best-effort default repo path.
 
@@ -41,20 +64,36 @@ def _default_repo_path() -> Path:
 
     We allow overriding via env var to support running the server from a
     different working directory.
+
+    Computed once per process; see :func:`refresh_defaults`.
     """
 
     env = os.environ.get("WAD_PROJECT_ROOT")
     if env:
-        return Path(env).expanduser().resolve()
-    return Path.cwd().resolve()
+        return _resolve_dir(env)
+    return _resolve_dir(os.getcwd())
+
+
+@lru_cache(maxsize=64)
+def _resolve_dir(path: str) -> Path:
+    """Expand and resolve a directory path.
+
+    Cached because `resolve()` stats every path component, and tools are
+    called with the same few directories over and over.
+    """
 
+    return Path(path).expanduser().resolve()
 
+
+@cache
 def _default_wad_bin() -> str:
     """Best-effort discovery of the `wad` executable.
 
     Priority:
     1) $WAD_BIN if set
     2) `wad` in PATH
+
+    Computed once per process; see :func:`refresh_defaults`.
     """
 
     if os.environ.get("WAD_BIN"):
@@ -63,12 +102,130 @@ def _default_wad_bin() -> str:
     return "wad"
 
 
-def _truncate(text: str, *, max_chars: int) -> str:
-    if len(text) <= max_chars:
-        return text
-    head = text[: max_chars // 2]
-    tail = text[-(max_chars // 2) :]
-    return head + "\n\n...<output truncated>...\n\n" + tail
+def refresh_defaults() -> None:
+    """Forget cached defaults so the next call re-reads env vars and the cwd.
+
+    Only needed when `WAD_PROJECT_ROOT`, `WAD_BIN` or the working directory
+    change after the first command has run (e.g. in tests).
+    """
+
+    _default_repo_path.cache_clear()
+    _default_wad_bin.cache_clear()
+    _resolve_dir.cache_clear()
+
+
+def _build_env(defaults: dict[str, str], extra_env: dict[str, str] | None) -> dict[str, str] | None:
+    """Environment for a `wad` child process.
+
+    `defaults` only apply where the inherited environment does not set them;
+    `extra_env` always wins. Returns None (inherit as-is) when there is nothing
+    to add, which avoids copying os.environ.
+    """
+
+    if not extra_env and defaults.keys() <= os.environ.keys():
+        return None
+    env = {**defaults, **os.environ}
+    if extra_env:
+        env.update({k: str(v) for k, v in extra_env.items()})
+    return env
+
+
+def _kill(proc: asyncio.subprocess.Process) -> None:
+    """Kill `proc` and anything it spawned.
+
+    Children run in their own session, so killing the process group also stops
+    grandchildren (e.g. `docker compose exec`) that would otherwise keep the
+    output pipes open after `wad` itself is gone.
+    """
+
+    with contextlib.suppress(ProcessLookupError):
+        os.killpg(proc.pid, signal.SIGKILL)
+
+
+_TRUNCATION_MARKER = "\n\n...<output truncated>...\n\n"
+
+
+async def _wait_and_drain(
+    proc: asyncio.subprocess.Process,
+    reader_tasks: list[asyncio.Task[None]],
+    timeout_s: float | None,
+) -> bool:
+    """Wait until `proc` has exited and its output readers hit EOF.
+
+    The timeout covers both, so a grandchild that keeps a pipe open after `wad`
+    exits cannot hang the call. On timeout the process group is killed and the
+    readers get a short grace period to collect what is left in the pipes. The
+    group is also killed if the caller is cancelled (e.g. MCP `tasks/cancel`)
+    while `wad` is still running: it runs in its own session, so nothing else
+    would stop it.
+
+    Returns:
+        True if the timeout expired.
+    """
+
+    tasks = [asyncio.create_task(proc.wait()), *reader_tasks]
+    try:
+        try:
+            async with asyncio.timeout(timeout_s):
+                await asyncio.wait(tasks)
+            return False
+        except TimeoutError:
+            pass
+
+        _kill(proc)
+        await asyncio.wait(tasks, timeout=_KILL_GRACE_S)
+        return True
+    finally:
+        if proc.returncode is None:
+            _kill(proc)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class _OutputBuffer:
+    """Bounded capture of a byte stream, truncated in the middle when too long.
+
+    Only the first `max_bytes` bytes and a rolling tail of the last
+    `max_bytes // 2` are kept, so memory stays O(max_bytes) no matter how much
+    a command prints. Output longer than `max_bytes` comes back as its first and
+    last `max_bytes // 2` bytes around `_TRUNCATION_MARKER`. It is decoded once,
+    in :meth:`getvalue`.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self._max = max_bytes
+        self._half = max_bytes // 2
+        self._size = 0
+        self._head = bytearray()
+        self._tail = bytearray()
+
+    def append(self, data: bytes) -> None:
+        if self._size < self._max:
+            self._head += data[: self._max - self._size]
+        self._size += len(data)
+
+        self._tail += data
+        # Compact only once the tail holds twice what is needed (amortized O(1)).
+        if len(self._tail) > 2 * self._half:
+            del self._tail[: len(self._tail) - self._half]
+
+    def getvalue(self) -> str:
+        if self._size <= self._max:
+            return self._head.decode(errors="replace")
+        half = self._half
+        head = self._head[:half].decode(errors="replace")
+        tail = self._tail[len(self._tail) - half :].decode(errors="replace")
+        return f"{head}{_TRUNCATION_MARKER}{tail}"
+
+
+async def _capture(stream: asyncio.StreamReader | None, sink: _OutputBuffer) -> None:
+    """Copy `stream` into `sink` in large chunks until EOF."""
+
+    if stream is None:
+        return
+    while chunk := await stream.read(_READ_CHUNK):
+        sink.append(chunk)
 
 
 async def run_wad(
@@ -81,7 +238,8 @@ async def run_wad(
 ) -> WadResult:
     """Run a WAD command asynchronously.
 
-    This helper captures stdout/stderr once the process finishes.
+    This helper captures stdout/stderr (truncated as they stream in) and
+    returns once the process finishes.
 
     For long-running commands where clients want incremental status, prefer
     :func:`run_wad_with_status`.
@@ -92,25 +250,19 @@ async def run_wad(
         wad_bin: Path/name of `wad`. Defaults to $WAD_BIN, ./wad, or wad in PATH.
         extra_env: Extra environment variables.
         timeout_s: Optional timeout.
-        max_output_chars: Combined stdout/stderr truncation limit.
+        max_output_chars: Combined stdout/stderr truncation limit (counted in
+            bytes of raw output).
 
     Returns:
         WadResult with stdout/stderr captured.
     """
 
-    cwd_path = Path(repo_path).expanduser().resolve() if repo_path else _default_repo_path()
+    cwd_path = _resolve_dir(repo_path) if repo_path else _default_repo_path()
     exe = wad_bin or _default_wad_bin()
 
     cmd = [exe, *args]
 
-    env = os.environ.copy()
-    if extra_env:
-        env.update({k: str(v) for k, v in extra_env.items()})
-
-    # Prefer disabling ANSI output when supported.
-    # WAD uses hardcoded color codes today, but this helps future changes.
-    env.setdefault("NO_COLOR", "1")
-    env.setdefault("TERM", "dumb")
+    env = _build_env(_ENV_DEFAULTS, extra_env)
 
     proc = await asyncio.create_subprocess_exec(
         *cmd,
@@ -118,37 +270,28 @@ async def run_wad(
         env=env,
         stdout=asyncio.subprocess.PIPE,
         stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
     )
 
-    try:
-        stdout_b, stderr_b = await asyncio.wait_for(proc.communicate(), timeout=timeout_s)
-    except asyncio.TimeoutError:
-        proc.kill()
-        stdout_b, stderr_b = await proc.communicate()
-        return WadResult(
-            command=cmd,
-            cwd=str(cwd_path),
-            returncode=124,
-            stdout=_truncate(stdout_b.decode(errors="replace"), max_chars=max_output_chars),
-            stderr=_truncate(
-                (stderr_b.decode(errors="replace") + "\nTimed out"),
-                max_chars=max_output_chars,
-            ),
-        )
+    stdout_buf = _OutputBuffer(max_output_chars)
+    stderr_buf = _OutputBuffer(max_output_chars)
+    reader_tasks = [
+        asyncio.create_task(_capture(proc.stdout, stdout_buf)),
+        asyncio.create_task(_capture(proc.stderr, stderr_buf)),
+    ]
 
-    stdout = stdout_b.decode(errors="replace")
-    stderr = stderr_b.decode(errors="replace")
+    timed_out = await _wait_and_drain(proc, reader_tasks, timeout_s)
 
-    # Apply truncation after decode; keep each stream within max_output_chars.
-    stdout = _truncate(stdout, max_chars=max_output_chars)
-    stderr = _truncate(stderr, max_chars=max_output_chars)
+    if timed_out:
+        stderr_buf.append(b"\nTimed out")
 
     return WadResult(
         command=cmd,
+        command_str=format_command(cmd),
         cwd=str(cwd_path),
-        returncode=proc.returncode or 0,
-        stdout=stdout,
-        stderr=stderr,
+        returncode=124 if timed_out else (proc.returncode or 0),
+        stdout=stdout_buf.getvalue(),
+        stderr=stderr_buf.getvalue(),
     )
 
 
@@ -179,24 +322,69 @@ async def _apply_status_update(
             ts=now_rfc3339(),
         )
 
-    msg = status.to_status_message()
+    d = status.to_dict()
 
-    with contextlib.suppress(Exception):
-        await progress.set_message(msg)
-
-    with contextlib.suppress(Exception):
-        await ctx.log(
+    # The sends are best-effort and independent: run them concurrently and
+    # ignore failures.
+    sends = [
+        progress.set_message(status.to_status_message(d)),
+        ctx.log(
             status.message,
             level="info",
             logger_name="wad.status",
-            extra=status.to_dict(),
-        )
+            extra=d,
+        ),
+    ]
 
     # If the client provided a progressToken for the request, this will emit
     # MCP notifications/progress.
     if status.step is not None:
-        with contextlib.suppress(Exception):
-            await ctx.report_progress(status.step, status.total, status.message)
+        sends.append(ctx.report_progress(status.step, status.total, status.message))
+
+    await asyncio.gather(*sends, return_exceptions=True)
+
+
+class _StatusPublisher:
+    """Forward status updates to the client from a background task.
+
+    Output readers only hand statuses over, so a slow client never stalls pipe
+    reads. Updates that pile up while a send is in flight are coalesced to the
+    latest status per `code`, so the batching window adapts to how fast the
+    client accepts updates; every phase still gets reported.
+    """
+
+    def __init__(self, *, ctx: Context, progress: Progress) -> None:
+        self._ctx = ctx
+        self._progress = progress
+        self._pending: dict[str, WadStatus] = {}
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+
+    def publish(self, status: WadStatus) -> None:
+        # Re-insert so the pending order follows the latest update per code.
+        self._pending.pop(status.code, None)
+        self._pending[status.code] = status
+        self._wakeup.set()
+
+    async def aclose(self) -> None:
+        """Flush pending updates and stop the background task."""
+
+        self._closed = True
+        self._wakeup.set()
+        await self._task
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._pending:
+                batch = list(self._pending.values())
+                self._pending.clear()
+                for status in batch:
+                    await _apply_status_update(ctx=self._ctx, progress=self._progress, status=status)
+            if self._closed:
+                return
 
 
 async def run_wad_with_status(
@@ -220,6 +408,9 @@ async def run_wad_with_status(
     - persist the JSON into the MCP task `statusMessage` (via Docket Progress)
     - emit an MCP log message with `extra` containing the same JSON
 
+    Updates are sent from a background task; if several arrive for the same
+    `code` while a send is in flight, only the latest is sent.
+
     Args:
         args: Arguments passed to `wad`.
         ctx: FastMCP Context (injected).
@@ -228,27 +419,20 @@ async def run_wad_with_status(
         wad_bin: Path/name of `wad`.
         extra_env: Extra environment variables.
         timeout_s: Optional timeout.
-        max_output_chars: Combined stdout/stderr truncation limit.
+        max_output_chars: Combined stdout/stderr truncation limit (counted in
+            bytes of raw output).
         on_status: Optional callback invoked for each parsed status update.
 
     Returns:
         WadResult with stdout/stderr captured.
     """
 
-    cwd_path = Path(repo_path).expanduser().resolve() if repo_path else _default_repo_path()
+    cwd_path = _resolve_dir(repo_path) if repo_path else _default_repo_path()
     exe = wad_bin or _default_wad_bin()
 
     cmd = [exe, *args]
 
-    env = os.environ.copy()
-    if extra_env:
-        env.update({k: str(v) for k, v in extra_env.items()})
-
-    # Enable structured status marker emission from the `wad` bash script.
-    env.setdefault("WAD_MCP_STATUS", "1")
-
-    env.setdefault("NO_COLOR", "1")
-    env.setdefault("TERM", "dumb")
+    env = _build_env(_STATUS_ENV_DEFAULTS, extra_env)
 
     proc = await asyncio.create_subprocess_exec(
         *cmd,
@@ -256,28 +440,68 @@ async def run_wad_with_status(
         env=env,
         stdout=asyncio.subprocess.PIPE,
         stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
     )
 
-    stdout_buf: list[str] = []
-    stderr_buf: list[str] = []
+    # Output is truncated as it streams in so long-running commands (e.g. agent
+    # waits) do not accumulate their whole output in memory.
+    stdout_buf = _OutputBuffer(max_output_chars)
+    stderr_buf = _OutputBuffer(max_output_chars)
+    last_status: WadStatus | None = None
+    publisher = _StatusPublisher(ctx=ctx, progress=progress)
+
+    async def _handle_line(line_b: bytes) -> None:
+        nonlocal last_status
+
+        # Markers may be indented; only copy-strip lines that start with space.
+        marker_b = line_b.lstrip() if line_b[:1].isspace() else line_b
+        if not marker_b.startswith(_STATUS_PREFIX):
+            return
+
+        status = WadStatus.from_json(marker_b[len(_STATUS_PREFIX) :])
+        if status is None:
+            return
+
+        last_status = status
+        publisher.publish(status)
+        if on_status is not None:
+            await on_status(status)
 
-    async def _reader(stream: asyncio.StreamReader | None, sink: list[str]) -> None:
+    async def _reader(stream: asyncio.StreamReader | None, sink: _OutputBuffer) -> None:
         if stream is None:
             return
-        while True:
-            line_b = await stream.readline()
-            if not line_b:
-                return
-            line = line_b.decode(errors="replace")
-            sink.append(line)
 
-            status = parse_wad_status_line(line.strip())
-            if status is None:
+        # Read in large chunks and split lines ourselves; `pending` carries an
+        # incomplete last line over to the next chunk.
+        pending = b""
+        skipping = False
+        while chunk := await stream.read(_READ_CHUNK):
+            sink.append(chunk)
+
+            data = pending + chunk if pending else chunk
+            if skipping:
+                # Inside an overlong line: drop it up to its newline.
+                nl = data.find(b"\n")
+                if nl == -1:
+                    continue
+                data = data[nl + 1 :]
+                skipping = False
+
+            end = data.rfind(b"\n") + 1
+            pending = data[end:]
+            if len(pending) > _READ_CHUNK:
+                # Far longer than any status marker; don't hold on to it.
+                pending = b""
+                skipping = True
+
+            # Markers are rare: only split into lines when one is present.
+            if data.find(_STATUS_PREFIX, 0, end) == -1:
                 continue
+            for line_b in data[:end].split(b"\n"):
+                await _handle_line(line_b)
 
-            await _apply_status_update(ctx=ctx, progress=progress, status=status)
-            if on_status is not None:
-                await on_status(status)
+        if pending:
+            await _handle_line(pending)
 
     reader_tasks = [
         asyncio.create_task(_reader(proc.stdout, stdout_buf)),
@@ -285,34 +509,23 @@ async def run_wad_with_status(
     ]
 
     try:
-        await asyncio.wait_for(proc.wait(), timeout=timeout_s)
-    except asyncio.TimeoutError:
-        proc.kill()
-        with contextlib.suppress(Exception):
-            await proc.wait()
-        return WadResult(
-            command=cmd,
-            cwd=str(cwd_path),
-            returncode=124,
-            stdout=_truncate("".join(stdout_buf), max_chars=max_output_chars),
-            stderr=_truncate("".join(stderr_buf) + "\nTimed out", max_chars=max_output_chars),
-        )
+        timed_out = await _wait_and_drain(proc, reader_tasks, timeout_s)
     finally:
-        # Ensure reader tasks drain remaining output.
-        with contextlib.suppress(Exception):
-            await asyncio.gather(*reader_tasks)
+        await publisher.aclose()
 
-    stdout = _truncate("".join(stdout_buf), max_chars=max_output_chars)
-    stderr = _truncate("".join(stderr_buf), max_chars=max_output_chars)
+    if timed_out:
+        stderr_buf.append(b"\nTimed out")
 
     return WadResult(
         command=cmd,
+        command_str=format_command(cmd),
         cwd=str(cwd_path),
-        returncode=proc.returncode or 0,
-        stdout=stdout,
-        stderr=stderr,
+        returncode=124 if timed_out else (proc.returncode or 0),
+        stdout=stdout_buf.getvalue(),
+        stderr=stderr_buf.getvalue(),
+        last_status=last_status,
     )
 
 
 def format_command(cmd: Iterable[str]) -> str:
-    return " ".join(shlex.quote(c) for c in cmd)
+    return shlex.join(cmd)